@@ -9,15 +9,46 @@ by searching Google and updating the YAML file with the results.
 import yaml
 import time
 import requests
-from urllib.parse import urlparse, quote_plus
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import urlsplit, quote_plus
 import re
 from typing import Dict, List, Optional
+from functools import lru_cache
 import structlog
-from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
 
 # Set up logging
 LOGGER = structlog.get_logger(__name__)
 
+# Regex fallback: href attributes, url= parameters and bare URLs in a single pass
+FALLBACK_URL_RE = re.compile(
+    r'href="(?P<href>https?://[^"]*)"'
+    r'|url=(?P<param>http[^&]*)'
+    r'|(?P<bare>https?://[^\s"<>]+)'
+)
+
+# Google wraps organic results in /url?q=<target>&... redirect links
+GOOGLE_REDIRECT_RE = re.compile(r'/url\?q=([^&]*)')
+
+# Prefer libyaml's C emitter when PyYAML was built against it
+YAML_DUMPER = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+# Hosts (and their subdomains and country variants) that are never a municipality's own website
+EXCLUDED_DOMAIN_RE = re.compile(r'(?:^|\.)(?:google|youtube|facebook)\.com(?:\.[a-z]{2})?$')
+
+# Keyword groups checked against each candidate domain, one scan per group
+COMMERCIAL_DOMAIN_RE = re.compile(r'\.com|\.net')
+GOVERNMENT_KEYWORD_RE = re.compile(r'township|borough|city|town|village')
+
+@lru_cache(maxsize=1024)
+def get_hostname(url: str) -> str:
+    """Return the lowercased hostname of a URL, or an empty string if it has none."""
+    try:
+        return urlsplit(url).hostname or ''
+    except ValueError:
+        return ''
+
 class MunicipalityWebsiteFinder:
     def __init__(self, yaml_file_path: str, output_file_path: str = None):
         self.yaml_file_path = yaml_file_path
@@ -28,16 +59,23 @@ class MunicipalityWebsiteFinder:
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
+        # Retry dropped connections with backoff on the pooled keep-alive connection;
+        # 429/503 responses are not retried, so a Google block surfaces via raise_for_status()
+        adapter = HTTPAdapter(max_retries=Retry(total=3, backoff_factor=0.3, respect_retry_after_header=False))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         
     def load_municipalities(self) -> List[str]:
-        """Load municipalities from YAML file."""
+        """Load municipalities from YAML file, reading it only on the first call."""
+        if self.municipalities:
+            return self.municipalities
+        
         try:
             with open(self.yaml_file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-                # Parse the simple list format
-                municipalities = [line.strip() for line in content.strip().split('\n') if line.strip()]
-                LOGGER.info(f"Loaded {len(municipalities)} municipalities")
-                return municipalities
+                # Parse the simple list format, streaming one line at a time
+                self.municipalities = [name for name in (line.strip() for line in file) if name]
+                LOGGER.info(f"Loaded {len(self.municipalities)} municipalities")
+                return self.municipalities
         except Exception as e:
             LOGGER.error(f"Error loading municipalities: {e}")
             return []
@@ -64,7 +102,7 @@ class MunicipalityWebsiteFinder:
             response = self.session.get(search_url, timeout=10)
             response.raise_for_status()
             
-            # Extract URLs from search results using BeautifulSoup
+            # Extract URLs from search results using lxml
             urls = self.extract_urls_from_google(response.text)
             
             # Find the most likely official website
@@ -82,66 +120,68 @@ class MunicipalityWebsiteFinder:
             return None
     
     def extract_urls_from_google(self, html_content: str) -> List[str]:
-        """Extract URLs from Google search results HTML using BeautifulSoup."""
+        """Extract URLs from Google search results HTML using lxml."""
         urls = []
+        seen = set()
         
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
+            document = lxml_html.fromstring(html_content)
             
             # Look for search result links
-            # Google search results typically have links in divs with class 'g' or similar
-            search_results = soup.find_all('a', href=True)
-            
-            for link in search_results:
-                href = link.get('href', '')
-                
+            # XPath selects only anchor hrefs, returned as plain strings detached from the tree
+            for href in document.xpath('//a/@href', smart_strings=False):
                 # Filter out Google's own URLs and extract actual search result URLs
-                if href.startswith('/url?q='):
+                redirect = GOOGLE_REDIRECT_RE.match(href)
+                if redirect:
                     # Extract the actual URL from Google's redirect
-                    actual_url = href.split('/url?q=')[1].split('&')[0]
-                    if actual_url.startswith('http'):
-                        urls.append(actual_url)
-                elif href.startswith('http') and not any(domain in href.lower() for domain in ['google.com', 'youtube.com', 'facebook.com']):
-                    urls.append(href)
+                    url = redirect.group(1)
+                    if not url.startswith('http'):
+                        continue
+                elif href.startswith('http') and not EXCLUDED_DOMAIN_RE.search(get_hostname(href)):
+                    url = href
+                else:
+                    continue
+                
+                # Remove duplicates as we go, keeping result order, and stop at the limit
+                if url in seen:
+                    continue
+                seen.add(url)
+                urls.append(url)
+                if len(urls) == 15:
+                    break
             
-            # Remove duplicates and limit results
-            unique_urls = list(set(urls))[:15]
-            LOGGER.debug(unique_urls)
+            LOGGER.debug(urls)
             
-            LOGGER.debug(f"Extracted {len(unique_urls)} URLs from search results")
-            return unique_urls
+            LOGGER.debug(f"Extracted {len(urls)} URLs from search results")
+            return urls
             
+        except etree.ParserError:
+            # lxml rejects pages with no elements (blank, doctype- or comment-only); they have no results
+            return []
         except Exception as e:
             LOGGER.error(f"Error parsing HTML: {e}")
-            # Fallback to regex if BeautifulSoup fails
+            # Fallback to regex if lxml fails
             return self.extract_urls_fallback(html_content)
     
     def extract_urls_fallback(self, html_content: str) -> List[str]:
-        """Fallback URL extraction using regex if BeautifulSoup fails."""
+        """Fallback URL extraction using regex if lxml fails."""
         urls = []
+        seen = set()
         
-        # Look for common patterns in Google search results
-        patterns = [
-            r'href="([^"]*)"',
-            r'url=([^&]*)',
-            r'https?://[^\s"<>]+'
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, html_content)
-            for match in matches:
-                if match.startswith('http'):
-                    urls.append(match)
-        
-        # Remove duplicates and filter out Google's own URLs
-        filtered_urls = []
-        for url in urls:
-            if not any(domain in url.lower() for domain in ['google.com', 'youtube.com', 'facebook.com']):
-                filtered_urls.append(url)
+        # Look for common patterns in Google search results, dropping duplicates
+        # and Google's own URLs in the same pass
+        for match in FALLBACK_URL_RE.finditer(html_content):
+            url = match.group(match.lastgroup)
+            if url in seen or EXCLUDED_DOMAIN_RE.search(get_hostname(url)):
+                continue
+            seen.add(url)
+            urls.append(url)
+            if len(urls) == 10:
+                break
         
-        LOGGER.debug(filtered_urls)
+        LOGGER.debug(urls)
         
-        return list(set(filtered_urls))[:10]
+        return urls
     
     def find_official_website(self, urls: List[str], municipality: str) -> Optional[str]:
         """
@@ -159,7 +199,12 @@ class MunicipalityWebsiteFinder:
         for url in urls:
             score = 0
             try:
-                domain = urlparse(url).netloc.lower()
+                domain = get_hostname(url)
+                
+                # Skip URLs that could not be parsed into a hostname
+                if not domain:
+                    LOGGER.error(f"Error parsing URL {url}: no hostname")
+                    continue
                 
                 # Higher score for government domains
                 for gov_domain in official_domains:
@@ -187,11 +232,11 @@ class MunicipalityWebsiteFinder:
                     score += 2
                 
                 # Lower score for commercial domains
-                if any(commercial in domain for commercial in ['.com', '.net']):
+                if COMMERCIAL_DOMAIN_RE.search(domain):
                     score -= 2
                 
                 # Bonus for common government site patterns
-                if any(pattern in domain for pattern in ['township', 'borough', 'city', 'town', 'village']):
+                if GOVERNMENT_KEYWORD_RE.search(domain):
                     score += 3
                 
                 scored_urls.append((url, score))
@@ -225,7 +270,13 @@ class MunicipalityWebsiteFinder:
         for i, municipality in enumerate(municipalities, 1):
             LOGGER.info(f"Processing {i}/{total}: {municipality}")
             
-            website = self.search_municipality_website(municipality)
+            # Several NJ municipalities share a name, so reuse an earlier successful search;
+            # failed lookups are retried on the next occurrence
+            website = self.website_results.get(municipality)
+            if not website:
+                website = self.search_municipality_website(municipality)
+                if website:
+                    self.website_results[municipality] = website
             if website:
                 results[municipality] = website
             
@@ -250,7 +301,7 @@ class MunicipalityWebsiteFinder:
                 }
             
             with open(self.output_file_path, 'w', encoding='utf-8') as file:
-                yaml.dump(yaml_data, file, default_flow_style=False, indent=2, allow_unicode=True)
+                yaml.dump(yaml_data, file, Dumper=YAML_DUMPER, default_flow_style=False, indent=2, allow_unicode=True)
             
             LOGGER.info(f"Results saved to {self.output_file_path}")
             